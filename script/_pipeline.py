@@ -0,0 +1,216 @@
+"""Shared load/filter pipeline for samples.py and table1.py.
+
+Both scripts need the same three parquet tables and the same kept-PR
+selection, so the loading and filtering live here and are memoized:
+running the scripts in one process loads the data exactly once.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+import pyarrow.dataset as ds
+from huggingface_hub import hf_hub_download
+
+HF_REPO_ID = "hao-li/AIDev"
+MIN_STARS = 500
+
+AGENTS = ["Claude_Code", "Copilot", "Cursor", "Devin", "OpenAI_Codex"]
+
+BOT_LIST = [
+    "copilot-swe-agent[bot]",
+    "cursor[bot]",
+    "gemini-code-assist[bot]",
+    "copilot-pull-request-reviewer[bot]",
+    "coderabbitai[bot]",
+    "ellipsis-dev[bot]",
+    "greptile-apps[bot]",
+    "entelligence-ai-pr-reviews[bot]",
+    "Copilot",
+    "github-advanced-security[bot]",
+]
+
+# Hashed once at import; membership tests never rebuild it from the list
+BOT_SET = frozenset(BOT_LIST)
+
+
+def read_parquet(
+    name: str,
+    columns: Optional[Sequence[str]] = None,
+    filter: Optional[ds.Expression] = None,
+    batch_size: Optional[int] = None,
+    base_dir: Optional[Path] = None,
+) -> pd.DataFrame:
+    """Read a parquet file, pushing projection and filter into the scan.
+
+    Using a pyarrow dataset lets the reader skip row groups via footer
+    statistics instead of downloading full columns and filtering in pandas.
+    Without ``base_dir`` files come through the huggingface_hub cache, so
+    each parquet file is downloaded once and re-runs read from local disk.
+
+    With ``batch_size`` set the scan is streamed batch by batch and only the
+    rows surviving the filter are kept, so peak memory stays at one batch
+    plus the filtered result instead of the whole decoded table.
+    """
+    if base_dir is None:
+        path = hf_hub_download(repo_id=HF_REPO_ID, filename=name, repo_type="dataset")
+    else:
+        path = base_dir / name
+    dataset = ds.dataset(path, format="parquet")
+    columns = list(columns) if columns else None
+    if batch_size is None:
+        table = dataset.to_table(columns=columns, filter=filter)
+        return table.to_pandas(types_mapper=pd.ArrowDtype)
+    scanner = dataset.scanner(columns=columns, filter=filter, batch_size=batch_size)
+    parts = [
+        batch.to_pandas(types_mapper=pd.ArrowDtype)
+        for batch in scanner.to_batches()
+        if batch.num_rows
+    ]
+    if not parts:
+        return scanner.projected_schema.empty_table().to_pandas(
+            types_mapper=pd.ArrowDtype
+        )
+    return pd.concat(parts, ignore_index=True)
+
+
+def load_tables(
+    base_dir: Optional[Path] = None,
+) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """Load (repos, prs, comments), filtered and typed, memoized per source.
+
+    The stars/state/user_type predicates are enforced inside the parquet
+    scan, so the frames arrive pre-filtered and those columns need not be
+    projected. The three files are independent, so their downloads and scans
+    run in parallel; pyarrow releases the GIL while reading.
+    """
+    # Always pass the argument positionally: lru_cache would otherwise key
+    # load_tables() and load_tables(base_dir=None) as two separate entries.
+    return _load_tables_cached(base_dir)
+
+
+@lru_cache(maxsize=None)
+def _load_tables_cached(
+    base_dir: Optional[Path],
+) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        repos_f = pool.submit(
+            read_parquet,
+            "repository.parquet",
+            ["id"],
+            ds.field("stars") >= MIN_STARS,
+            base_dir=base_dir,
+        )
+        prs_f = pool.submit(
+            read_parquet,
+            "pull_request.parquet",
+            ["id", "repo_id", "agent", "user", "merged_at", "html_url"],
+            ds.field("state") == "closed",
+            200_000,
+            base_dir=base_dir,
+        )
+        comments_f = pool.submit(
+            read_parquet,
+            "pr_comments.parquet",
+            ["pr_id"],
+            ds.field("user_type") == "User",
+            base_dir=base_dir,
+        )
+        repos, prs, comments = repos_f.result(), prs_f.result(), comments_f.result()
+
+    # Cast id columns once at load time so downstream filters never
+    # re-materialize int arrays on every mask.
+    repos = repos.astype({"id": "int64"}, copy=False)
+    prs = prs.astype({"id": "int64", "repo_id": "int64"}, copy=False)
+    # Downstream only needs the unique set of human-commented PR ids, so
+    # collapse the many-comments-per-PR fan-out right away.
+    comments = (
+        comments.dropna(subset=["pr_id"])
+        .astype({"pr_id": "int64"}, copy=False)
+        .drop_duplicates("pr_id", ignore_index=True)
+    )
+
+    # Low-cardinality string columns become categoricals: comparisons and
+    # groupby then work on small integer codes instead of re-hashing strings.
+    for col in ("agent", "user"):
+        prs[col] = prs[col].astype("category")
+
+    return repos, prs, comments
+
+
+def _isin_sorted(values: np.ndarray, candidates: np.ndarray) -> np.ndarray:
+    """Membership test via binary search over a sorted candidate array.
+
+    Sorting once and probing with searchsorted streams sequentially through
+    memory, unlike a hashtable whose probes miss cache on large id sets.
+    """
+    if candidates.size == 0:
+        return np.zeros(len(values), dtype=bool)
+    candidates = np.sort(candidates)
+    pos = np.searchsorted(candidates, values).clip(max=candidates.size - 1)
+    return candidates[pos] == values
+
+
+def compute_masks(
+    repos: pd.DataFrame, prs: pd.DataFrame, comments: pd.DataFrame
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return the (in_repo, is_bot, has_human_comment) masks over prs.
+
+    The id lookups work on contiguous int64 arrays with binary search, so no
+    Python ints are hashed row by row.
+    """
+    repo_ids = repos["id"].to_numpy("int64")
+    human_commented_ids = comments["pr_id"].to_numpy("int64")
+    in_repo = _isin_sorted(prs["repo_id"].to_numpy("int64"), repo_ids)
+    # user is categorical: find the bot categories once, then compare the
+    # small integer codes instead of matching strings per row
+    user = prs["user"]
+    bot_codes = np.flatnonzero(user.cat.categories.isin(BOT_SET))
+    is_bot = np.isin(user.cat.codes.to_numpy(), bot_codes)
+    has_human_comment = _isin_sorted(prs["id"].to_numpy("int64"), human_commented_ids)
+    return in_repo, is_bot, has_human_comment
+
+
+def compute_kept(
+    repos: pd.DataFrame,
+    prs: pd.DataFrame,
+    comments: pd.DataFrame,
+    masks: Optional[tuple[np.ndarray, np.ndarray, np.ndarray]] = None,
+) -> pd.DataFrame:
+    """Select the kept PRs with one fused mask and a single slice.
+
+    Callers that already computed the masks (e.g. for diagnostics) can pass
+    them in to avoid a second pass over the PR table.
+    """
+    if masks is None:
+        masks = compute_masks(repos, prs, comments)
+    in_repo, is_bot, has_human_comment = masks
+    kept = prs[in_repo & ~(is_bot & ~has_human_comment)]
+    # merged_at is Arrow-backed, so notna() reads the validity bitmap
+    # (one bit per row) rather than comparing timestamp values; store the
+    # result as a plain numpy bool column for cheap downstream masking.
+    return kept.assign(is_merged=kept["merged_at"].notna().to_numpy(dtype=bool))
+
+
+def compute_table1(kept: pd.DataFrame) -> pd.DataFrame:
+    """Aggregate kept PRs into the per-agent total/merged/rejected table.
+
+    The agent column is categorical, so the tally is two bincounts over its
+    integer codes — no groupby or hashing at all; reindexing on AGENTS keeps
+    only known agents, in a fixed order.
+    """
+    agent = kept["agent"]
+    cats = agent.cat.categories
+    codes = agent.cat.codes.to_numpy()
+    valid = codes >= 0  # -1 marks a missing agent
+    is_merged = kept["is_merged"].to_numpy(dtype=bool)
+    total = np.bincount(codes[valid], minlength=len(cats))
+    merged = np.bincount(codes[valid & is_merged], minlength=len(cats))
+    table = pd.DataFrame({"total": total, "merged": merged}, index=cats).reindex(
+        AGENTS, fill_value=0
+    )
+    table["rejected"] = table["total"] - table["merged"]
+    return table.rename_axis("agent").reset_index()